@@ -36,6 +36,40 @@ ONBEKEND_PROJECT = "_onbekend"
 # Default LLM model (later eenvoudig aanpasbaar)
 TEXT_MODEL = "gpt-4o"
 
+# Lange notities worden in overlappende stukken (tekens) opgeknipt en parallel
+# geclassificeerd; daarna worden de entries per project samengevoegd
+CHUNK_CHARS = 12000
+CHUNK_OVERLAP = 800
+
+# Maximaal aantal gelijktijdige LLM-aanroepen
+MAX_WORKERS = 4
+
+# Aantal keer dat het model opnieuw om geldige JSON wordt gevraagd als lokale
+# reparatie van de uitvoer niet lukt (daarna gaat de uitvoer naar _onbekend)
+MAX_REASK = 1
+
+# Streamingmodus (--stream): maximaal aantal bestanden tegelijk onderweg
+STREAM_WINDOW = 8
+
+# Interactieve modus: aantal volgende bestanden dat al op de achtergrond wordt
+# geclassificeerd terwijl je een keuze maakt
+PREFETCH_FILES = 2
+
+# Aantal mislukte pogingen waarna een bestand naar input/quarantine/ gaat
+MAX_ATTEMPTS = 3
+
+# Lokale classificatie van _onbekend (--reclassify-onbekend): een entry wordt
+# alleen verplaatst bij een minimale gelijkenis én voldoende voorsprong op het
+# op één na beste project
+RECLASSIFY_MIN_SCORE = 0.2
+RECLASSIFY_MARGIN = 0.08
+
+# Optioneel: oudere datumsecties verhuizen naar jaararchieven in projecten/archief/,
+# zodat het hoofdbestand alleen de recente periode bevat
+SHARD_LOGS = False
+# Aantal dagen dat in het hoofdbestand blijft staan
+SHARD_KEEP_DAYS = 180
+
 # Documentenmap voor referentiecontext (mapnamen, contactpersonen, spelling)
 DOCS_DIR = "/Users/arthur/Documents"
 
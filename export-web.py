@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""Exporteer projecten/*.md naar statische bestanden voor de web-app in docs/.
+
+Uitvoer in docs/logs/:
+- index.json            overzicht van alle projecten met per datumsectie een hash
+- <slug>.html           leesbare pagina per project
+- <slug>/<datum>-<hash>.html  losse HTML-fragmenten per datumsectie
+
+Incrementeel: een fragment wordt alleen gerenderd als de hash van zijn
+datumsectie nieuw is, en een projectpagina wordt alleen herschreven als er
+een sectie is gewijzigd. docs/logs.html haalt index.json op en downloadt
+alleen de fragmenten die de telefoon nog niet heeft; de projectpagina's
+zelf worden bij elke wijziging volledig opnieuw geladen.
+"""
+
+import hashlib
+import html
+import importlib.util
+import json
+import os
+import re
+import unicodedata
+from collections import defaultdict
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECTEN_DIR = os.path.join(REPO_DIR, "projecten")
+ARCHIEF_DIR = os.path.join(PROJECTEN_DIR, "archief")
+EXPORT_DIR = os.path.join(REPO_DIR, "docs", "logs")
+
+_SECTION_RE = re.compile(r"^## (\d{4}-\d{2}-\d{2})\s*$")
+_SHARD_RE = re.compile(r"^(.+) – (\d{4})\.md$")
+
+# md_to_html staat in sync-notes.py (bestandsnaam met streepje, dus via importlib)
+_spec = importlib.util.spec_from_file_location("sync_notes", os.path.join(REPO_DIR, "sync-notes.py"))
+_sync_notes = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(_sync_notes)
+md_to_html = _sync_notes.md_to_html
+
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="nl">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>{title}</title>
+<style>
+  body {{ font-family: -apple-system, BlinkMacSystemFont, sans-serif; background: #1a1a1a; color: #eee; margin: 0 auto; max-width: 46rem; padding: 1rem; line-height: 1.4; }}
+  h1 {{ font-size: 1.4rem; }}
+  h2 {{ font-size: 1.1rem; color: #999; margin-top: 2rem; }}
+  ul {{ padding-left: 1.2rem; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+{body}
+</body>
+</html>
+"""
+
+
+def slugify(name: str) -> str:
+    """Bestandsveilige naam, bijv. 'SWZ – Veemarkt' → 'swz-veemarkt'."""
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]+", "-", ascii_name.lower()).strip("-")
+
+
+def split_sections(content: str) -> dict[str, str]:
+    """{datum: sectietekst} voor alle ## YYYY-MM-DD secties."""
+    sections: dict[str, list[str]] = {}
+    current = None
+    for line in content.split("\n"):
+        m = _SECTION_RE.match(line.strip())
+        if m:
+            current = m.group(1)
+            sections.setdefault(current, [])
+            sections[current].append(line)
+        elif current:
+            sections[current].append(line)
+    return {d: "\n".join(lines).strip() for d, lines in sections.items()}
+
+
+def collect_projects() -> dict[str, dict[str, str]]:
+    """{project: {datum: sectietekst}}, inclusief archiefshards."""
+    projects: dict[str, dict[str, str]] = defaultdict(dict)
+    sources: list[tuple[str, str]] = []
+
+    for filename in sorted(os.listdir(PROJECTEN_DIR)):
+        if filename.endswith(".md") and not filename.startswith((".", "_")):
+            sources.append((filename.removesuffix(".md"), os.path.join(PROJECTEN_DIR, filename)))
+    if os.path.isdir(ARCHIEF_DIR):
+        for filename in sorted(os.listdir(ARCHIEF_DIR)):
+            m = _SHARD_RE.match(filename)
+            if m and not filename.startswith((".", "_")):
+                sources.append((m.group(1), os.path.join(ARCHIEF_DIR, filename)))
+
+    for project, path in sources:
+        with open(path, "r", encoding="utf-8") as f:
+            projects[project].update(split_sections(f.read()))
+    return projects
+
+
+def _write_if_changed(path: str, content: str) -> bool:
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read() == content:
+                return False
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+    return True
+
+
+def export_all():
+    """Exporteer alle projectlogs naar docs/logs/."""
+    if not os.path.isdir(PROJECTEN_DIR):
+        print("Geen projecten/ map gevonden.")
+        return
+
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    rendered = 0
+    pages = 0
+    index: list[dict] = []
+    wanted: set[str] = set()
+
+    for project, sections in sorted(collect_projects().items()):
+        slug = slugify(project)
+        fragment_dir = os.path.join(EXPORT_DIR, slug)
+        os.makedirs(fragment_dir, exist_ok=True)
+
+        entries: list[dict] = []
+        fragments: list[str] = []
+        for section_date in sorted(sections, reverse=True):
+            text = sections[section_date]
+            digest = hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+            rel = f"{slug}/{section_date}-{digest}.html"
+            path = os.path.join(EXPORT_DIR, rel)
+            wanted.add(rel)
+
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    fragment = f.read()
+            else:
+                fragment = md_to_html(html.escape(text, quote=False))
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(fragment)
+                rendered += 1
+
+            fragments.append(fragment)
+            entries.append({"date": section_date, "hash": digest, "fragment": rel})
+
+        page = PAGE_TEMPLATE.format(title=html.escape(project), body="\n".join(fragments))
+        wanted.add(f"{slug}.html")
+        if _write_if_changed(os.path.join(EXPORT_DIR, f"{slug}.html"), page):
+            pages += 1
+
+        index.append({
+            "name": project,
+            "slug": slug,
+            "page": f"{slug}.html",
+            "updated": entries[0]["date"] if entries else None,
+            "sections": entries,
+        })
+
+    # Verouderde fragmenten en pagina's (bijv. hernoemde of verwijderde
+    # projecten) opruimen, en daarna lege projectmappen
+    removed = 0
+    for root, _dirs, filenames in os.walk(EXPORT_DIR, topdown=False):
+        for filename in filenames:
+            rel = os.path.relpath(os.path.join(root, filename), EXPORT_DIR)
+            if filename.endswith(".html") and rel.replace(os.sep, "/") not in wanted:
+                os.remove(os.path.join(root, filename))
+                removed += 1
+        if root != EXPORT_DIR and not os.listdir(root):
+            os.rmdir(root)
+
+    index_json = json.dumps({"projects": index}, ensure_ascii=False, indent=1) + "\n"
+    _write_if_changed(os.path.join(EXPORT_DIR, "index.json"), index_json)
+
+    print(f"{rendered} secties gerenderd, {pages} pagina's bijgewerkt, {removed} verwijderd.")
+
+
+if __name__ == "__main__":
+    export_all()
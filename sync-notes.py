@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 """Sync projecten/*.md naar Apple Notities (map 'Projectenlog')."""
 
+import hashlib
+import json
 import os
 import re
 import subprocess
@@ -8,6 +10,8 @@ import sys
 
 REPO_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECTEN_DIR = os.path.join(REPO_DIR, "projecten")
+ARCHIEF_DIR = os.path.join(PROJECTEN_DIR, "archief")
+STATE_FILE = os.path.join(REPO_DIR, ".notes-sync-state.json")
 FOLDER_NAME = "Projectenlog"
 
 
@@ -78,11 +82,11 @@ end tell'''],
     return result.stdout.strip() == "yes"
 
 
-def create_note(name: str, html_body: str):
-    """Maak een nieuwe notitie aan."""
+def create_note(name: str, html_body: str) -> bool:
+    """Maak een nieuwe notitie aan. Geeft True terug als dat gelukt is."""
     # Titel wordt de <h1>, body volgt daarna
     full_html = f"<h1>{name}</h1>\n{html_body}"
-    subprocess.run(
+    result = subprocess.run(
         ["osascript", "-e", f'''
 tell application "Notes"
     set f to folder "{FOLDER_NAME}"
@@ -90,12 +94,13 @@ tell application "Notes"
 end tell'''],
         capture_output=True, text=True
     )
+    return result.returncode == 0
 
 
-def update_note(name: str, html_body: str):
-    """Werk een bestaande notitie bij."""
+def update_note(name: str, html_body: str) -> bool:
+    """Werk een bestaande notitie bij. Geeft True terug als dat gelukt is."""
     full_html = f"<h1>{name}</h1>\n{html_body}"
-    subprocess.run(
+    result = subprocess.run(
         ["osascript", "-e", f'''
 tell application "Notes"
     set f to folder "{FOLDER_NAME}"
@@ -104,6 +109,7 @@ tell application "Notes"
 end tell'''],
         capture_output=True, text=True
     )
+    return result.returncode == 0
 
 
 def _escape(s: str) -> str:
@@ -111,8 +117,37 @@ def _escape(s: str) -> str:
     return s.replace("\\", "\\\\").replace('"', '\\"')
 
 
+def _log_files() -> list[tuple[str, str]]:
+    """(notitienaam, pad) voor alle projectlogs en hun archiefshards."""
+    files: list[tuple[str, str]] = []
+    for directory in (PROJECTEN_DIR, ARCHIEF_DIR):
+        if not os.path.isdir(directory):
+            continue
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith(".md") or filename.startswith((".", "_")):
+                continue
+            files.append((filename.removesuffix(".md"), os.path.join(directory, filename)))
+    return files
+
+
+def _load_state() -> dict[str, str]:
+    if os.path.exists(STATE_FILE):
+        with open(STATE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def _save_state(state: dict[str, str]):
+    with open(STATE_FILE, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+
+
 def sync_all():
-    """Sync alle projecten naar Apple Notities."""
+    """Sync alle projecten naar Apple Notities.
+
+    Alleen logs waarvan de inhoud sinds de vorige sync is gewijzigd worden
+    opnieuw naar Notes gestuurd (bijgehouden via een hash per bestand).
+    """
     if not os.path.isdir(PROJECTEN_DIR):
         print("Geen projecten/ map gevonden.")
         return
@@ -130,29 +165,38 @@ end tell'''],
         capture_output=True, text=True
     )
 
+    state = _load_state()
     count = 0
-    for filename in sorted(os.listdir(PROJECTEN_DIR)):
-        if not filename.endswith(".md") or filename.startswith(".") or filename == "_onbekend.md":
-            continue
-
-        filepath = os.path.join(PROJECTEN_DIR, filename)
+    for name, filepath in _log_files():
         with open(filepath, "r", encoding="utf-8") as f:
             content = f.read().strip()
 
         if not content:
             continue
 
-        name = filename.removesuffix(".md")
+        digest = hashlib.sha1(content.encode("utf-8")).hexdigest()
+        if state.get(name) == digest:
+            continue
+
         html = md_to_html(content)
 
         if note_exists(name):
-            update_note(name, html)
-            print(f"  Bijgewerkt: {name}")
+            ok = update_note(name, html)
+            action = "Bijgewerkt"
         else:
-            create_note(name, html)
-            print(f"  Aangemaakt: {name}")
+            ok = create_note(name, html)
+            action = "Aangemaakt"
+
+        # Alleen als gesynchroniseerd markeren als osascript slaagde, zodat
+        # een mislukte poging de volgende keer opnieuw wordt geprobeerd
+        if not ok:
+            print(f"  Mislukt: {name}")
+            continue
+        print(f"  {action}: {name}")
+        state[name] = digest
         count += 1
 
+    _save_state(state)
     print(f"{count} notities gesynchroniseerd.")
 
 
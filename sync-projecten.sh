@@ -11,20 +11,40 @@ echo "$(date '+%Y-%m-%d %H:%M:%S')  Sync gestart" >> "$LOG"
 
 mkdir -p "$ICLOUD_DIR"
 
-# Download alle .md bestanden via Python (voorkomt problemen met spaties)
+# Download alle .md bestanden via Python (voorkomt problemen met spaties).
+# Archiefshards in projecten/archief/ gaan mee; ongewijzigde bestanden
+# (zelfde git blob-sha als lokaal) worden overgeslagen.
 curl -s "https://api.github.com/repos/$REPO/contents/projecten?ref=$BRANCH" \
   | python3 -c "
-import sys, json, urllib.request, urllib.parse, os
+import sys, json, urllib.request, urllib.parse, os, hashlib
 icloud = os.path.expanduser('$ICLOUD_DIR')
-for f in json.load(sys.stdin):
-    name = f['name']
-    if not name.endswith('.md'):
-        continue
-    encoded = urllib.parse.quote(name)
-    url = 'https://raw.githubusercontent.com/$REPO/$BRANCH/projecten/' + encoded
-    dest = os.path.join(icloud, name)
-    urllib.request.urlretrieve(url, dest)
-    print('Gesynct: ' + name)
+
+def blob_sha(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as fh:
+        data = fh.read()
+    return hashlib.sha1(b'blob %d\\0' % len(data) + data).hexdigest()
+
+def sync(listing, subdir):
+    os.makedirs(os.path.join(icloud, subdir), exist_ok=True)
+    for f in listing:
+        name = f['name']
+        if f['type'] == 'dir' and name == 'archief' and not subdir:
+            url = 'https://api.github.com/repos/$REPO/contents/projecten/archief?ref=$BRANCH'
+            sync(json.load(urllib.request.urlopen(url)), 'archief')
+            continue
+        if not name.endswith('.md'):
+            continue
+        rel = os.path.join(subdir, name) if subdir else name
+        dest = os.path.join(icloud, rel)
+        if blob_sha(dest) == f['sha']:
+            continue
+        url = 'https://raw.githubusercontent.com/$REPO/$BRANCH/projecten/' + urllib.parse.quote(rel)
+        urllib.request.urlretrieve(url, dest)
+        print('Gesynct: ' + rel)
+
+sync(json.load(sys.stdin), '')
 " 2>&1 | while IFS= read -r line; do
   echo "$(date '+%Y-%m-%d %H:%M:%S')  $line" >> "$LOG"
 done
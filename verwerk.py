@@ -1,15 +1,26 @@
 from __future__ import annotations
 
+import difflib
+import fcntl
+import hashlib
 import json
 import logging
+import math
 import os
 import re
 import shutil
+import stat
 import sys
-from collections import defaultdict
-from datetime import date, datetime
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from functools import lru_cache
 
-from openai import OpenAI
+from openai import BadRequestError, OpenAI
 
 # Load .env file if present (for API key)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -23,13 +34,24 @@ if os.path.exists(_env_path):
                 os.environ.setdefault(_key.strip(), _val.strip())
 
 from config import (
+    CHUNK_CHARS,
+    CHUNK_OVERLAP,
     CLIENT_FOLDERS,
     DOCS_DIR,
     ICLOUD_INBOX,
     ICLOUD_PROCESSED,
     ICLOUD_PROJECTEN,
+    MAX_ATTEMPTS,
+    MAX_REASK,
+    MAX_WORKERS,
     ONBEKEND_PROJECT,
+    PREFETCH_FILES,
     PROJECTEN,
+    RECLASSIFY_MARGIN,
+    RECLASSIFY_MIN_SCORE,
+    SHARD_KEEP_DAYS,
+    SHARD_LOGS,
+    STREAM_WINDOW,
     TEXT_MODEL,
     USE_LOCAL_PATHS,
 )
@@ -44,9 +66,22 @@ else:
     PROCESSED = os.path.expanduser(ICLOUD_PROCESSED)
     PROJECTEN_DIR = os.path.expanduser(ICLOUD_PROJECTEN)
 
+ARCHIEF_DIR = os.path.join(PROJECTEN_DIR, "archief")
+RETRY_QUEUE = os.path.join(os.path.dirname(INBOX), "retry.json")
+QUARANTINE = os.path.join(os.path.dirname(INBOX), "quarantine")
+TRANSCRIPT_CACHE = os.path.join(os.path.dirname(INBOX), "cache", "transcripts")
+REBUILD_DIR = os.path.join(os.path.dirname(INBOX), "rebuild")
+REBUILD_MANIFEST = os.path.join(REBUILD_DIR, "manifest.json")
+CLASSIFICATION_CACHE = os.path.join(os.path.dirname(INBOX), "cache", "classifications")
+SUMMARY_CACHE = os.path.join(os.path.dirname(INBOX), "cache", "summaries.json")
+DIGEST_SEEN = os.path.join(os.path.dirname(INBOX), "cache", "digest-seen.json")
+DIGEST_FILE = "_digest.md"
+
 AUDIO_EXTENSIONS = (".m4a", ".wav", ".mp3", ".webm", ".mp4")
 TEXT_EXTENSIONS = (".txt", ".md")
 
+SUBSECTION_NAMES = ["Besluiten / afspraken:", "Signalen / aandachtspunten:"]
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s  %(levelname)s  %(message)s",
@@ -56,6 +91,16 @@ log = logging.getLogger(__name__)
 
 client = OpenAI()
 
+# Shared by every thread pool, including the chunk pools nested inside file
+# workers, so MAX_WORKERS really is the limit on concurrent completions
+_llm_slots = threading.BoundedSemaphore(MAX_WORKERS)
+
+
+def chat_completion(messages: list[dict], **options):
+    """client.chat.completions.create on TEXT_MODEL, at most MAX_WORKERS at once."""
+    with _llm_slots:
+        return client.chat.completions.create(model=TEXT_MODEL, messages=messages, **options)
+
 
 # ---------------------------------------------------------------------------
 # Directory setup
@@ -150,16 +195,38 @@ def get_plain_text(file_path: str) -> str | None:
         return None
     ext = os.path.splitext(file_path)[1].lower()
     if ext in AUDIO_EXTENSIONS:
-        return transcribe(file_path)
+        return cached_transcribe(file_path)
     if ext in TEXT_EXTENSIONS:
         return read_text(file_path)
     return None
 
 
+def cached_transcribe(audio_path: str) -> str:
+    """Transcribe audio, reusing an earlier transcript of the same file content.
+
+    The cache is keyed by a hash of the audio bytes, so it stays valid after
+    the file has moved from the inbox to input/processed/.
+    """
+    sha = hashlib.sha1()
+    with open(audio_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    cache_path = os.path.join(TRANSCRIPT_CACHE, f"{sha.hexdigest()}.txt")
+
+    if os.path.exists(cache_path):
+        return read_text(cache_path)
+
+    text = transcribe(audio_path)
+    os.makedirs(TRANSCRIPT_CACHE, exist_ok=True)
+    atomic_write(cache_path, text)
+    return text
+
+
 # ---------------------------------------------------------------------------
 # Reference context (unchanged)
 # ---------------------------------------------------------------------------
 
+@lru_cache(maxsize=None)
 def gather_reference_context() -> str:
     """Scan client folders in Documents for project names, people, and companies."""
     if not os.path.isdir(DOCS_DIR):
@@ -200,6 +267,7 @@ def gather_reference_context() -> str:
     return "\n".join(lines)
 
 
+@lru_cache(maxsize=None)
 def gather_contacts() -> str:
     """Read contacts from Apple Contacts, filtered to known clients."""
     try:
@@ -301,13 +369,13 @@ Signalen / aandachtspunten:
 
 BELANGRIJK: Laat een sectie volledig weg als er geen inhoud voor is. Als er geen besluiten/afspraken zijn, neem "Besluiten / afspraken:" niet op. Als er geen signalen/aandachtspunten zijn, neem "Signalen / aandachtspunten:" niet op. Neem nooit een sectie op met een leeg streepje.
 
-Geef je antwoord als JSON: een array van objecten met "project" (exact de projectnaam uit bovenstaande lijst, of "{ONBEKEND_PROJECT}") en "entry" (de inhoud ZONDER datumregel).
+Geef je antwoord als JSON-object met "entries": een array van objecten met "project" (exact de projectnaam uit bovenstaande lijst, of "{ONBEKEND_PROJECT}") en "entry" (de inhoud ZONDER datumregel).
 
 Voorbeeld:
-[
+{{"entries": [
   {{"project": "SWZ – Veemarkt", "entry": "Besluiten / afspraken:\\n- …\\n\\nSignalen / aandachtspunten:\\n- …"}},
   {{"project": "{ONBEKEND_PROJECT}", "entry": "Besluiten / afspraken:\\n- …"}}
-]
+]}}
 
 TEKST:
 {text}"""
@@ -327,25 +395,288 @@ def strip_code_fences(text: str) -> str:
 
 
 def parse_entries(llm_output: str) -> list[dict]:
-    return json.loads(strip_code_fences(llm_output))
+    return validate_entries(json.loads(strip_code_fences(llm_output)))
+
+
+def entries_response_format() -> dict:
+    """Structured-output schema for {"entries": [{project, entry}, ...]}."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "projectlog_entries",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "entries": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "project": {
+                                    "type": "string",
+                                    "enum": list(PROJECTEN) + [ONBEKEND_PROJECT],
+                                },
+                                "entry": {"type": "string"},
+                            },
+                            "required": ["project", "entry"],
+                            "additionalProperties": False,
+                        },
+                    },
+                },
+                "required": ["entries"],
+                "additionalProperties": False,
+            },
+        },
+    }
+
+
+def validate_entries(data) -> list[dict]:
+    """Check parsed JSON against the {project, entry} shape.
+
+    Accepts the schema wrapper {"entries": [...]}, a bare array, or a single
+    {project, entry} object. Every item needs both keys as strings; project
+    names go through normalize_project_name and items with empty entry text
+    are dropped. Raises ValueError on any other shape, so a wrong-shaped
+    reply goes through repair and re-ask instead of counting as zero entries.
+    """
+    if isinstance(data, dict):
+        if "entries" in data:
+            data = data["entries"]
+        elif "project" in data and "entry" in data:
+            data = [data]
+        else:
+            raise ValueError(f"onverwachte sleutels: {', '.join(map(str, data))[:80]}")
+    if not isinstance(data, list):
+        raise ValueError(f"verwachtte een lijst, kreeg {type(data).__name__}")
+
+    entries: list[dict] = []
+    for item in data:
+        if not (
+            isinstance(item, dict)
+            and isinstance(item.get("project"), str)
+            and isinstance(item.get("entry"), str)
+        ):
+            raise ValueError(f"ongeldige entry: {item!r:.80}")
+        content = item["entry"].strip()
+        if content:
+            entries.append({"project": normalize_project_name(item["project"]), "entry": content})
+    return entries
+
+
+def repair_json(text: str) -> str:
+    """Best-effort fix of near-valid JSON from the LLM.
 
+    Handles code fences, chatter around the JSON, smart quotes used as
+    delimiters, unescaped quotes and raw newlines inside strings, trailing
+    commas and output that was cut off before the closing brackets.
+    """
+    text = strip_code_fences(text)
+    starts = [i for i in (text.find("["), text.find("{")) if i != -1]
+    if starts:
+        text = text[min(starts):]
+
+    out: list[str] = []
+    stack: list[str] = []
+    quote = ""  # the quote that opened the current string, "" outside strings
+    nested = 0  # “…” pairs inside a string that was itself opened with “
+    escaped = False
+    for i, ch in enumerate(text):
+        if quote:
+            if escaped:
+                escaped = False
+                out.append(ch)
+            elif ch == "\\":
+                escaped = True
+                out.append(ch)
+            elif ch in '"\u201c\u201d':
+                # A quote closes only a string it pairs with, and only when a
+                # delimiter follows; any other quote is part of the text
+                if quote == '"':
+                    closes = ch == '"'
+                else:
+                    closes = ch != "\u201c" and not nested
+                if closes and re.match(r"\s*(?:[,:}\]]|$)", text[i + 1 :]):
+                    quote = ""
+                    out.append('"')
+                    continue
+                if quote == "\u201c" and ch == "\u201c":
+                    nested += 1
+                elif quote == "\u201c" and ch == "\u201d" and nested:
+                    nested -= 1
+                out.append('\\"' if ch == '"' else ch)
+            elif ch == "\n":
+                out.append("\\n")
+            elif ch == "\t":
+                out.append("\\t")
+            elif ch != "\r":
+                out.append(ch)
+            continue
 
-def read_existing_log(project: str) -> str:
-    """Read the existing log file for a project, or return ''."""
+        if ch in '"\u201c\u201d':
+            quote = '"' if ch == '"' else "\u201c"
+            nested = 0
+            out.append('"')
+        elif ch in "[{":
+            stack.append("]" if ch == "[" else "}")
+            out.append(ch)
+        elif ch in "]}":
+            if stack and stack[-1] == ch:
+                stack.pop()
+                out.append(ch)
+            if not stack:
+                break  # ignore anything after the top-level value
+        else:
+            out.append(ch)
+
+    if quote:
+        out.append('"')
+    repaired = re.sub(r"[,:\s]+$", "", "".join(out)) + "".join(reversed(stack))
+    return re.sub(r",(\s*[}\]])", r"\1", repaired)
+
+
+_parse_stats: Counter = Counter()
+_parse_stats_lock = threading.Lock()
+
+
+def _count_parse(outcome: str):
+    with _parse_stats_lock:
+        _parse_stats[outcome] += 1
+
+
+def log_parse_stats():
+    """Report how LLM outputs were parsed during this run."""
+    total = sum(_parse_stats.values())
+    if not total:
+        return
+    log.info(
+        "LLM-uitvoer: %d direct geldig, %d lokaal gerepareerd (%.0f%%), "
+        "%d na herhaalvraag, %d afgebroken en gesplitst, %d naar %s.",
+        _parse_stats["direct"], _parse_stats["gerepareerd"],
+        100 * _parse_stats["gerepareerd"] / total,
+        _parse_stats["herhaalvraag"], _parse_stats["gesplitst"],
+        _parse_stats["mislukt"], ONBEKEND_PROJECT,
+    )
+
+
+def log_path(project: str, year: str | None = None, base_dir: str | None = None) -> str:
+    """Path of a project's log file, or of its archive shard for `year`.
+
+    `base_dir` replaces PROJECTEN_DIR, e.g. for the rebuild staging directory.
+    """
     safe_name = project.replace("/", "-").replace("\\", "-")
-    path = os.path.join(PROJECTEN_DIR, f"{safe_name}.md")
+    base_dir = base_dir or PROJECTEN_DIR
+    if year:
+        return os.path.join(base_dir, "archief", f"{safe_name} – {year}.md")
+    return os.path.join(base_dir, f"{safe_name}.md")
+
+
+def read_existing_log(project: str, year: str | None = None, base_dir: str | None = None) -> str:
+    """Read the existing log file (or archive shard) for a project, or return ''."""
+    path = log_path(project, year, base_dir)
     if os.path.exists(path):
         with open(path, "r", encoding="utf-8") as f:
             return f.read()
     return ""
 
 
-def write_log(project: str, content: str):
-    """Overwrite the log file for a project."""
-    safe_name = project.replace("/", "-").replace("\\", "-")
-    path = os.path.join(PROJECTEN_DIR, f"{safe_name}.md")
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(content)
+def write_log(project: str, content: str, year: str | None = None, base_dir: str | None = None):
+    """Overwrite the log file (or archive shard) for a project."""
+    path = log_path(project, year, base_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    atomic_write(path, content)
+
+
+def atomic_write(path: str, content: str):
+    """Write content to a temp file next to `path`, then rename it into place.
+
+    Readers see either the old or the new file, never a truncated one.
+    """
+    directory, basename = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{basename}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates 0600; keep the original mode, or the usual one for new files
+        if os.path.exists(path):
+            os.chmod(tmp_path, stat.S_IMODE(os.stat(path).st_mode))
+        else:
+            os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _current_umask() -> int:
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+_UMASK = _current_umask()
+
+
+@contextmanager
+def file_lock(path: str):
+    """Advisory exclusive lock on `path`, held via a .<name>.lock file beside it.
+
+    Locks are per open file, so they also serialize threads within one process.
+    """
+    directory, basename = os.path.split(path)
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, f".{basename}.lock"), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def claim_file(file_path: str):
+    """Claim an inbox file for this run with a non-blocking per-file lock.
+
+    Returns the open lock file, or None if another run is processing the
+    file or has already archived it. The lock is held until release_claim,
+    so two runs on the same inbox never classify and merge the same memo.
+    """
+    directory, basename = os.path.split(file_path)
+    lock_file = open(os.path.join(directory, f".{basename}.lock"), "a")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        return None
+    if not os.path.exists(file_path):
+        # The previous holder archived it between our scan and the lock
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        lock_file.close()
+        return None
+    return lock_file
+
+
+def release_claim(file_path: str, lock_file):
+    """Release a claim; drop the lock file once the input file has moved on.
+
+    While the input file is still in the inbox (e.g. after a failure) the
+    lock file is kept, so a later claim locks the same inode.
+    """
+    if not os.path.exists(file_path):
+        directory, basename = os.path.split(file_path)
+        try:
+            os.remove(os.path.join(directory, f".{basename}.lock"))
+        except FileNotFoundError:
+            pass
+    fcntl.flock(lock_file, fcntl.LOCK_UN)
+    lock_file.close()
+
+
+def project_lock(project: str, base_dir: str | None = None):
+    """Lock guarding a project's main log and all of its archive shards."""
+    return file_lock(log_path(project, base_dir=base_dir))
 
 
 def append_to_date_section(existing: str, entry_date: str, new_bullets: str) -> str:
@@ -391,14 +722,20 @@ def append_to_date_section(existing: str, entry_date: str, new_bullets: str) ->
 
 def _merge_subsections(existing_section: str, new_bullets: str, header: str) -> str:
     """Merge new bullet content into an existing date section."""
-    subsection_names = ["Besluiten / afspraken:", "Signalen / aandachtspunten:"]
-
     # Parse new bullets into subsections
-    new_parts = _split_subsections(new_bullets, subsection_names)
-    existing_parts = _split_subsections(existing_section, subsection_names)
+    new_parts = _split_subsections(new_bullets, SUBSECTION_NAMES)
+    existing_parts = _split_subsections(existing_section, SUBSECTION_NAMES)
 
     result = [header, ""]
-    for name in subsection_names:
+
+    # Older sections may hold plain bullets without a sub-section heading;
+    # keep those at the top instead of dropping them
+    loose = _loose_bullets(existing_section) + _loose_bullets(new_bullets)
+    if loose:
+        result.extend(loose)
+        result.append("")
+
+    for name in SUBSECTION_NAMES:
         combined = []
         if name in existing_parts:
             combined.extend(existing_parts[name])
@@ -412,6 +749,18 @@ def _merge_subsections(existing_section: str, new_bullets: str, header: str) ->
     return "\n".join(result).rstrip("\n") + "\n"
 
 
+def _loose_bullets(text: str) -> list[str]:
+    """Bullet lines that appear before any sub-section heading."""
+    bullets: list[str] = []
+    for line in text.split("\n"):
+        stripped = line.strip()
+        if stripped in SUBSECTION_NAMES:
+            break
+        if stripped.startswith("- "):
+            bullets.append(line)
+    return bullets
+
+
 def _split_subsections(text: str, names: list[str]) -> dict[str, list[str]]:
     """Split text into named subsections, returning {name: [bullet lines]}."""
     result: dict[str, list[str]] = {}
@@ -420,12 +769,297 @@ def _split_subsections(text: str, names: list[str]) -> dict[str, list[str]]:
         stripped = line.strip()
         if stripped in names:
             current = stripped
-            result[current] = []
+            result.setdefault(current, [])
         elif current and stripped.startswith("- "):
             result[current].append(line)
     return result
 
 
+# ---------------------------------------------------------------------------
+# Sharding (current period in the main file, older years in archief/)
+# ---------------------------------------------------------------------------
+
+_SECTION_RE = re.compile(r"^## (\d{4}-\d{2}-\d{2})\s*$")
+
+
+def split_date_sections(content: str) -> tuple[str, list[tuple[str, str]]]:
+    """Split a log into (preamble, [(date, section_text), ...]) in file order."""
+    preamble: list[str] = []
+    sections: list[tuple[str, list[str]]] = []
+    for line in content.split("\n"):
+        m = _SECTION_RE.match(line.strip())
+        if m:
+            sections.append((m.group(1), [line]))
+        elif sections:
+            sections[-1][1].append(line)
+        else:
+            preamble.append(line)
+    return (
+        "\n".join(preamble).strip(),
+        [(d, "\n".join(lines).strip() + "\n") for d, lines in sections],
+    )
+
+
+def _join_sections(preamble: str, sections: list[str]) -> str:
+    parts = ([preamble] if preamble else []) + [s.strip() for s in sections]
+    return "\n\n".join(parts) + "\n\n" if parts else ""
+
+
+def shard_years(project: str, base_dir: str | None = None) -> list[str]:
+    """Years for which the project has an archive shard, oldest first."""
+    archief_dir = os.path.join(base_dir, "archief") if base_dir else ARCHIEF_DIR
+    if not os.path.isdir(archief_dir):
+        return []
+    prefix = os.path.basename(log_path(project)).removesuffix(".md") + " – "
+    return sorted(
+        filename[len(prefix):-3]
+        for filename in os.listdir(archief_dir)
+        if filename.startswith(prefix) and re.fullmatch(r"\d{4}\.md", filename[len(prefix):])
+    )
+
+
+def _shard_cutoff() -> str:
+    """Sections dated before this ISO date belong in the archive."""
+    return (date.today() - timedelta(days=SHARD_KEEP_DAYS)).isoformat()
+
+
+def _section_body(section: str) -> str:
+    """Section text without its ## date line."""
+    return section.split("\n", 1)[1] if "\n" in section else ""
+
+
+def rotate_log(project: str, base_dir: str | None = None, update_index: bool = True) -> int:
+    """Move date sections older than the cutoff from the main file to year shards.
+
+    Returns the number of sections moved. Only the main file and the shards
+    it writes to are parsed, so the cost is bounded by the size of the
+    current period. With update_index=False the caller rewrites the archive
+    index itself (shard_all does so once at the end).
+    """
+    with project_lock(project, base_dir):
+        moved, counts = _rotate_log(project, base_dir)
+        if counts and update_index:
+            update_archive_index(project, counts, base_dir)
+    return moved
+
+
+def _rotate_log(project: str, base_dir: str | None) -> tuple[int, dict[str, int]]:
+    """Returns (sections moved, {year: section count} of the shards written)."""
+    existing = read_existing_log(project, base_dir=base_dir)
+    preamble, sections = split_date_sections(existing)
+    cutoff = _shard_cutoff()
+
+    keep = [text for d, text in sections if d >= cutoff]
+    old = [(d, text) for d, text in sections if d < cutoff]
+    if not old:
+        return 0, {}
+
+    by_year: dict[str, list[tuple[str, str]]] = defaultdict(list)
+    for d, text in old:
+        by_year[d[:4]].append((d, text))
+
+    counts: dict[str, int] = {}
+    for year, year_sections in sorted(by_year.items()):
+        archive = read_existing_log(project, year, base_dir)
+        for d, text in year_sections:
+            archive = append_to_date_section(archive, d, _section_body(text))
+        write_log(project, archive, year, base_dir)
+        counts[year] = _count_sections(archive)
+
+    write_log(project, _join_sections(preamble, keep), base_dir=base_dir)
+    return len(old), counts
+
+
+def _count_sections(content: str) -> int:
+    return sum(1 for line in content.split("\n") if _SECTION_RE.match(line.strip()))
+
+
+_SHARD_FILE_RE = re.compile(r"^(.+) – (\d{4})\.md$")
+_INDEX_ENTRY_RE = re.compile(r"^- \[(\d{4})\]\(<.*>\) — (\d+) datumsecties$")
+
+
+def write_archive_index(base_dir: str | None = None):
+    """Write archief/_index.md listing every shard per project.
+
+    Reads every shard, so it is only used when the index is missing and at
+    the end of shard_all; merges use update_archive_index.
+    """
+    archief_dir = os.path.join(base_dir, "archief") if base_dir else ARCHIEF_DIR
+    if not os.path.isdir(archief_dir):
+        return
+    shards: dict[str, dict[str, int]] = defaultdict(dict)
+    for filename in sorted(os.listdir(archief_dir)):
+        m = _SHARD_FILE_RE.match(filename)
+        if not m:
+            continue
+        shards[m.group(1)][m.group(2)] = _count_sections(read_text(os.path.join(archief_dir, filename)))
+
+    index_path = os.path.join(archief_dir, "_index.md")
+    with file_lock(index_path):
+        atomic_write(index_path, _format_archive_index(shards))
+
+
+def update_archive_index(project: str, counts: dict[str, int], base_dir: str | None = None):
+    """Set the section counts of the given shards in archief/_index.md.
+
+    Only the index itself is read, not the other shards, so the cost of a
+    merge does not grow with the size of the archive.
+    """
+    archief_dir = os.path.join(base_dir, "archief") if base_dir else ARCHIEF_DIR
+    index_path = os.path.join(archief_dir, "_index.md")
+    if not os.path.exists(index_path):
+        write_archive_index(base_dir)
+        return
+
+    with file_lock(index_path):
+        shards: dict[str, dict[str, int]] = defaultdict(dict)
+        current = None
+        for line in read_text(index_path).split("\n"):
+            if line.startswith("## "):
+                current = line[3:].strip()
+            elif current and (m := _INDEX_ENTRY_RE.match(line)):
+                shards[current][m.group(1)] = int(m.group(2))
+        shards[project].update(counts)
+        atomic_write(index_path, _format_archive_index(shards))
+
+
+def _format_archive_index(shards: dict[str, dict[str, int]]) -> str:
+    lines = ["# Archief", ""]
+    for project in sorted(shards):
+        lines.append(f"## {project}")
+        lines.append("")
+        for year, count in sorted(shards[project].items(), reverse=True):
+            lines.append(f"- [{year}](<{project} – {year}.md>) — {count} datumsecties")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def merge_into_log(project: str, entry_date: str, bullets: str, base_dir: str | None = None):
+    """Merge bullets into the project's log, routing old dates to their shard.
+
+    The log is re-read under the project lock, so entries written meanwhile
+    by another run are merged with rather than overwritten.
+    """
+    if SHARD_LOGS and entry_date < _shard_cutoff():
+        year = entry_date[:4]
+        with project_lock(project, base_dir):
+            existing = read_existing_log(project, year, base_dir)
+            merged = append_to_date_section(existing, entry_date, bullets)
+            write_log(project, merged, year, base_dir)
+            update_archive_index(project, {year: _count_sections(merged)}, base_dir)
+        return
+
+    with project_lock(project, base_dir):
+        existing = read_existing_log(project, base_dir=base_dir)
+        merged = append_to_date_section(existing, entry_date, bullets)
+        write_log(project, merged, base_dir=base_dir)
+    if SHARD_LOGS:
+        rotate_log(project, base_dir)
+
+
+def shard_all():
+    """Rotate every project log once (e.g. right after enabling SHARD_LOGS)."""
+    ensure_dirs()
+    total = 0
+    for filename in sorted(os.listdir(PROJECTEN_DIR)):
+        if not filename.endswith(".md"):
+            continue
+        moved = rotate_log(filename.removesuffix(".md"), update_index=False)
+        if moved:
+            log.info("  %s: %d secties naar archief", filename.removesuffix(".md"), moved)
+        total += moved
+    write_archive_index()
+    log.info("Klaar (%d secties gearchiveerd).", total)
+
+
+# ---------------------------------------------------------------------------
+# Long notes (map-reduce)
+# ---------------------------------------------------------------------------
+
+def split_into_chunks(text: str, size: int = CHUNK_CHARS, overlap: int = CHUNK_OVERLAP) -> list[str]:
+    """Split text into overlapping chunks of at most `size` characters.
+
+    Cuts prefer a paragraph break, then a line break, then a sentence end in
+    the second half of the window, so bullets are rarely split mid-sentence.
+    """
+    text = text.strip()
+    if len(text) <= size:
+        return [text]
+
+    chunks: list[str] = []
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            for sep in ("\n\n", "\n", ". "):
+                cut = text.rfind(sep, start + size // 2, end)
+                if cut != -1:
+                    end = cut + len(sep)
+                    break
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return chunks
+
+
+def _bullet_key(bullet: str) -> str:
+    """Normalized form of a bullet line, used to detect duplicates."""
+    text = bullet.strip().removeprefix("- ").lower()
+    text = re.sub(r"\s+", " ", text)
+    return text.rstrip(" .;")
+
+
+def reduce_entries(entries: list[dict]) -> list[dict]:
+    """Merge {project, entry} dicts per project and drop duplicate bullets.
+
+    Overlapping chunks of one note often yield the same bullet twice; those
+    are collapsed here so the per-date merge only sees unique content.
+    """
+    order: list[str] = []
+    parts: dict[str, dict[str, list[str]]] = {}
+    loose: dict[str, list[str]] = defaultdict(list)
+    seen: dict[str, set[str]] = defaultdict(set)
+
+    for entry in entries:
+        project = normalize_project_name(entry.get("project", ONBEKEND_PROJECT))
+        content = entry.get("entry", "")
+        if not content.strip():
+            continue
+        if project not in parts:
+            order.append(project)
+            parts[project] = {name: [] for name in SUBSECTION_NAMES}
+
+        split = _split_subsections(content, SUBSECTION_NAMES)
+        if not split:
+            # No recognizable sub-sections — keep the entry as-is
+            if content.strip() not in loose[project]:
+                loose[project].append(content.strip())
+            continue
+
+        for name in SUBSECTION_NAMES:
+            for bullet in split.get(name, []):
+                key = _bullet_key(bullet)
+                if not key or key in seen[project]:
+                    continue
+                seen[project].add(key)
+                parts[project][name].append(bullet.strip())
+
+    result: list[dict] = []
+    for project in order:
+        blocks = [
+            name + "\n" + "\n".join(parts[project][name])
+            for name in SUBSECTION_NAMES
+            if parts[project][name]
+        ]
+        blocks.extend(loose[project])
+        if blocks:
+            result.append({"project": project, "entry": "\n\n".join(blocks)})
+    return result
+
+
 # ---------------------------------------------------------------------------
 # Archiving
 # ---------------------------------------------------------------------------
@@ -447,6 +1081,165 @@ def move_to_processed(file_path: str, file_date: str):
     shutil.move(file_path, dest)
 
 
+# ---------------------------------------------------------------------------
+# Retry queue & quarantine
+# ---------------------------------------------------------------------------
+
+def load_retry_queue() -> dict[str, dict]:
+    """Read {filename: {attempts, error, last_attempt}} for files that failed before."""
+    if not os.path.exists(RETRY_QUEUE):
+        return {}
+    with open(RETRY_QUEUE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@contextmanager
+def locked_retry_queue():
+    """Load the retry queue under its lock and write it back on exit.
+
+    Every change is a short read-modify-write, so concurrent runs never
+    overwrite each other's counts and a crash loses at most the current file.
+    """
+    with file_lock(RETRY_QUEUE):
+        queue = load_retry_queue()
+        yield queue
+        if queue:
+            atomic_write(RETRY_QUEUE, json.dumps(queue, ensure_ascii=False, indent=2) + "\n")
+        elif os.path.exists(RETRY_QUEUE):
+            os.remove(RETRY_QUEUE)
+
+
+def start_attempt(file_path: str) -> bool:
+    """Count an attempt as the file's processing starts.
+
+    The count is saved right away, so a file that hangs or kills the run
+    still reaches quarantine after MAX_ATTEMPTS runs. Returns False if the
+    attempts were already used up; the file is then quarantined instead.
+    """
+    name = os.path.basename(file_path)
+    try:
+        with locked_retry_queue() as queue:
+            item = queue.setdefault(name, {"attempts": 0})
+            if item["attempts"] >= MAX_ATTEMPTS:
+                _quarantine(queue, file_path)
+                return False
+            item["attempts"] += 1
+            item.setdefault("error", "run afgebroken tijdens verwerking")
+            item["last_attempt"] = datetime.now().isoformat(timespec="seconds")
+    except OSError as e:
+        log.error("  Retry-wachtrij bijwerken mislukt voor %s: %s", name, e)
+    return True
+
+
+def refund_attempt(file_path: str):
+    """Undo start_attempt for a file whose processing was interrupted, not failed."""
+    name = os.path.basename(file_path)
+    try:
+        with locked_retry_queue() as queue:
+            item = queue.get(name)
+            if item:
+                item["attempts"] -= 1
+                if item["attempts"] <= 0:
+                    del queue[name]
+    except OSError as e:
+        log.error("  Retry-wachtrij bijwerken mislukt voor %s: %s", name, e)
+
+
+_attempts_lock = threading.Lock()
+
+
+def process_attempt(
+    file_path: str, file_date: str, started: dict[str, bool], stop: threading.Event | None = None
+) -> list[dict] | None:
+    """Count an attempt and process the file; meant to run inside the worker.
+
+    Only files whose processing actually starts are charged. `started` maps
+    each charged file to whether it produced a result, for refund_attempts;
+    callers drop a file from it once it is archived or its failure recorded.
+    Once `stop` is set, files are not started at all. Returns None if the
+    file was quarantined instead.
+    """
+    with _attempts_lock:
+        if stop is not None and stop.is_set():
+            raise CancelledError()
+        if not start_attempt(file_path):
+            return None
+        started[file_path] = False
+    entries = validate_entries(process_file(file_path, file_date, extract_time_label(file_path)))
+    started[file_path] = True
+    return entries
+
+
+def refund_attempts(started: dict[str, bool], interrupted: bool, stop: threading.Event | None = None):
+    """Give back the attempts of files this run charged but did not finish.
+
+    After Ctrl-C every such file is refunded, since quitting is normal use;
+    after any other error only the files that never produced a result.
+    Sets `stop` first, so workers still running start nothing new.
+    """
+    with _attempts_lock:
+        if stop is not None:
+            stop.set()
+        for file_path, has_result in list(started.items()):
+            if interrupted or not has_result:
+                refund_attempt(file_path)
+
+
+def record_failure(file_path: str, error: Exception) -> bool:
+    """Record the error of the current attempt; quarantine after MAX_ATTEMPTS.
+
+    The file stays in the inbox until then, so the next run retries it.
+    Never raises, since it runs inside the callers' error handling.
+    Returns True if the file was quarantined.
+    """
+    name = os.path.basename(file_path)
+    message = f"{type(error).__name__}: {error}"
+    try:
+        with locked_retry_queue() as queue:
+            item = queue.setdefault(name, {"attempts": 1})
+            item["error"] = message
+            log.error("  Fout bij %s (poging %d/%d): %s", name, item["attempts"], MAX_ATTEMPTS, message)
+            if item["attempts"] < MAX_ATTEMPTS:
+                return False
+            _quarantine(queue, file_path)
+            return True
+    except OSError as e:
+        log.error("  Fout bij %s: %s (bijwerken retry-wachtrij mislukt: %s)", name, message, e)
+        return False
+
+
+def record_success(file_path: str):
+    """Forget earlier attempts once the file has been archived."""
+    name = os.path.basename(file_path)
+    try:
+        with locked_retry_queue() as queue:
+            queue.pop(name, None)
+    except OSError as e:
+        log.error("  Retry-wachtrij bijwerken mislukt voor %s: %s", name, e)
+
+
+def _quarantine(queue: dict[str, dict], file_path: str):
+    name = os.path.basename(file_path)
+    item = queue.pop(name)
+    if not os.path.exists(file_path):
+        log.warning("  %s staat niet meer in de inbox; niet in quarantaine gezet", name)
+        return
+    os.makedirs(QUARANTINE, exist_ok=True)
+    shutil.move(file_path, os.path.join(QUARANTINE, name))
+    with open(os.path.join(QUARANTINE, f"{name}.fout.txt"), "w", encoding="utf-8") as f:
+        f.write(f"Pogingen: {item['attempts']}\nLaatste poging: {item.get('last_attempt', '')}\n{item['error']}\n")
+    log.error("  In quarantaine: %s", name)
+
+
+def log_summary(processed: int, failed: list[str], quarantined: list[str]):
+    log.info("Samenvatting: %d verwerkt, %d mislukt, %d in quarantaine.",
+             processed, len(failed), len(quarantined))
+    if failed:
+        log.info("  Volgende run opnieuw: %s", ", ".join(failed))
+    if quarantined:
+        log.warning("  In quarantaine (%s): %s", QUARANTINE, ", ".join(quarantined))
+
+
 # ---------------------------------------------------------------------------
 # Interactive helpers (kept for manual use)
 # ---------------------------------------------------------------------------
@@ -476,8 +1269,24 @@ def ask_project_assignment(entry_content: str) -> str:
         print("  Ongeldig nummer, probeer opnieuw.")
 
 
-def suggest_aliases(project: str, entry_content: str):
-    """Suggest new aliases for the project and offer to add them to config.py."""
+def rank_projects(entry_content: str, limit: int = 3) -> list[str]:
+    """Cheap local guess of the most likely projects for an unknown entry.
+
+    Scores each project by how often its aliases and client name occur in
+    the text. Used to start alias suggestions before the user has chosen.
+    """
+    text = entry_content.lower()
+    scores: dict[str, int] = {}
+    for name, aliases in PROJECTEN.items():
+        terms = [a.lower() for a in aliases] + [name.split(" – ")[0].lower()]
+        score = sum(text.count(term) for term in terms if term)
+        if score:
+            scores[name] = score
+    return sorted(scores, key=lambda name: -scores[name])[:limit]
+
+
+def fetch_alias_suggestions(project: str, entry_content: str) -> list[str]:
+    """Ask the LLM for extra aliases for `project` (no user interaction)."""
     current = PROJECTEN[project]
 
     prompt = f"""Analyseer deze werknotitie die is toegewezen aan project "{project}".
@@ -492,16 +1301,27 @@ Geef je antwoord als JSON-array van strings, bijv. ["term1", "term2"].
 Tekst:
 {entry_content}"""
 
-    response = client.chat.completions.create(
-        model=TEXT_MODEL,
-        messages=[{"role": "user", "content": prompt}],
-    )
+    response = chat_completion([{"role": "user", "content": prompt}])
 
     try:
         suggestions = json.loads(strip_code_fences(response.choices[0].message.content))
     except (json.JSONDecodeError, ValueError):
-        return
+        return []
+    if not isinstance(suggestions, list):
+        return []
+    return [s for s in suggestions if isinstance(s, str)]
 
+
+def suggest_aliases(project: str, entry_content: str, suggestions: list[str] | None = None):
+    """Suggest new aliases for the project and offer to add them to config.py.
+
+    `suggestions` can be passed in when they were already fetched in the
+    background; otherwise they are fetched now.
+    """
+    if suggestions is None:
+        suggestions = fetch_alias_suggestions(project, entry_content)
+
+    current = PROJECTEN[project]
     suggestions = [s for s in suggestions if s not in current]
     if not suggestions:
         return
@@ -532,6 +1352,11 @@ Tekst:
 def update_config_aliases(project: str, new_aliases: list[str]):
     """Add new aliases to config.py for the given project."""
     config_path = os.path.join(BASE_DIR, "config.py")
+    with file_lock(config_path):
+        _update_config_aliases(config_path, project, new_aliases)
+
+
+def _update_config_aliases(config_path: str, project: str, new_aliases: list[str]):
     with open(config_path, "r", encoding="utf-8") as f:
         content = f.read()
 
@@ -544,19 +1369,20 @@ def update_config_aliases(project: str, new_aliases: list[str]):
         return f"{m.group(1)}{existing}, {additions}{m.group(3)}"
 
     new_content = re.sub(pattern, replacer, content)
-
-    with open(config_path, "w", encoding="utf-8") as f:
-        f.write(new_content)
+    atomic_write(config_path, new_content)
 
 
 # ---------------------------------------------------------------------------
 # File processing
 # ---------------------------------------------------------------------------
 
-def process_file(file_path: str, file_date: str, time_label: str) -> list[dict]:
+def process_file(
+    file_path: str, file_date: str, time_label: str, llm_options: dict | None = None
+) -> list[dict]:
     """Process a single file and return list of {project, entry} dicts.
 
     Does NOT write to log files — the caller handles merging per day.
+    `llm_options` are extra completion arguments, e.g. REBUILD_LLM_OPTIONS.
     """
     log.info("Verwerken: %s", os.path.basename(file_path))
 
@@ -565,25 +1391,91 @@ def process_file(file_path: str, file_date: str, time_label: str) -> list[dict]:
         log.info("  Overgeslagen (leeg bestand): %s", os.path.basename(file_path))
         return []
 
-    if time_label:
-        text = f"[memo {time_label}] {text}"
+    prefix = f"[memo {time_label}] " if time_label else ""
 
-    prompt = build_prompt(text, file_date)
+    chunks = split_into_chunks(text)
+    if len(chunks) == 1:
+        return classify_text(prefix + chunks[0], file_date, llm_options)
 
-    response = client.chat.completions.create(
-        model=TEXT_MODEL,
-        messages=[{"role": "user", "content": prompt}],
-    )
+    # Map: classify chunks in parallel; reduce: merge + dedupe per project
+    log.info("  Lange notitie: %d delen", len(chunks))
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(chunks))) as pool:
+        results = pool.map(lambda chunk: classify_text(prefix + chunk, file_date, llm_options), chunks)
+        entries = [entry for chunk_entries in results for entry in chunk_entries]
 
-    llm_output = response.choices[0].message.content
+    return reduce_entries(entries)
 
-    try:
-        entries = parse_entries(llm_output)
-    except (json.JSONDecodeError, ValueError) as e:
-        log.warning("  Fout bij parseren LLM-uitvoer: %s", e)
-        return [{"project": ONBEKEND_PROJECT, "entry": llm_output}]
 
-    return entries
+def classify_text(text: str, file_date: str, llm_options: dict | None = None) -> list[dict]:
+    """Send one piece of text to the LLM and return its {project, entry} dicts.
+
+    Output cut off at the token limit is never repaired, since the rest of
+    the note would be lost; the text is split and each part classified.
+    """
+    messages = [{"role": "user", "content": build_prompt(text, file_date)}]
+
+    for attempt in range(MAX_REASK + 1):
+        choice = classification_completion(messages, llm_options).choices[0]
+        llm_output = choice.message.content or ""
+
+        if choice.finish_reason == "length":
+            if len(text) > 2 * CHUNK_OVERLAP:
+                log.warning("  LLM-uitvoer afgebroken door tokenlimiet; tekst wordt gesplitst")
+                _count_parse("gesplitst")
+                parts = split_into_chunks(text, len(text) // 2 + 1, CHUNK_OVERLAP // 2)
+                return reduce_entries([
+                    entry for part in parts for entry in classify_text(part, file_date, llm_options)
+                ])
+            error = ValueError("uitvoer afgebroken door tokenlimiet")
+            retry_prompt = "Je antwoord werd afgebroken. Geef een beknopter antwoord, uitsluitend als geldige JSON volgens het gevraagde format."
+        else:
+            try:
+                entries = parse_entries(llm_output)
+            except (json.JSONDecodeError, ValueError, KeyError) as e:
+                error = e
+            else:
+                _count_parse("direct" if attempt == 0 else "herhaalvraag")
+                return entries
+
+            # Repair locally before spending another completion
+            try:
+                entries = validate_entries(json.loads(repair_json(llm_output)))
+            except (json.JSONDecodeError, ValueError, KeyError):
+                pass
+            else:
+                _count_parse("gerepareerd" if attempt == 0 else "herhaalvraag")
+                return entries
+            retry_prompt = f"Dit is geen geldige JSON ({error}). Geef exact hetzelfde antwoord opnieuw, uitsluitend als geldige JSON volgens het gevraagde format."
+
+        log.warning("  Fout bij parseren LLM-uitvoer (poging %d): %s", attempt + 1, error)
+        messages += [
+            {"role": "assistant", "content": llm_output},
+            {"role": "user", "content": retry_prompt},
+        ]
+
+    _count_parse("mislukt")
+    return [{"project": ONBEKEND_PROJECT, "entry": llm_output}]
+
+
+_json_schema_supported = True  # cleared once TEXT_MODEL rejects structured outputs
+
+
+def classification_completion(messages: list[dict], llm_options: dict | None = None):
+    """Chat completion constrained to the entries schema.
+
+    Models without structured outputs reject json_schema; the rest of the
+    run then uses plain JSON mode, which the local validation still checks.
+    """
+    global _json_schema_supported
+    if _json_schema_supported:
+        try:
+            return chat_completion(messages, response_format=entries_response_format(), **(llm_options or {}))
+        except BadRequestError as e:
+            if "response_format" not in str(e) and "json_schema" not in str(e):
+                raise
+            log.warning("  %s ondersteunt geen JSON-schema; verder in JSON-modus.", TEXT_MODEL)
+            _json_schema_supported = False
+    return chat_completion(messages, response_format={"type": "json_object"}, **(llm_options or {}))
 
 
 def run_batch():
@@ -602,32 +1494,174 @@ def run_batch():
         file_date = extract_date(file_path)
         by_date[file_date].append(file_path)
 
-    # Process each date group
-    for file_date in sorted(by_date):
-        # Collect all entries for this date across files
-        # {project: [bullet_text, ...]}
-        day_entries: dict[str, list[str]] = defaultdict(list)
+    processed = 0
+    failed: list[str] = []
+    quarantined: list[str] = []
+    started: dict[str, bool] = {}
+
+    try:
+        # Process each date group
+        for file_date in sorted(by_date):
+            # Collect all entries for this date across files
+            # {project: [bullet_text, ...]}
+            day_entries: dict[str, list[str]] = defaultdict(list)
+            day_files: list[str] = []
+            claims: dict[str, object] = {}
+
+            try:
+                for file_path in by_date[file_date]:
+                    name = os.path.basename(file_path)
+                    claim = claim_file(file_path)
+                    if claim is None:
+                        log.info("  Overgeslagen (andere run is bezig): %s", name)
+                        continue
+                    claims[file_path] = claim
+
+                    # One bad file must not stop the rest of the inbox
+                    try:
+                        entries = process_attempt(file_path, file_date, started)
+                    except Exception as e:
+                        started.pop(file_path, None)
+                        if record_failure(file_path, e):
+                            quarantined.append(name)
+                        else:
+                            failed.append(name)
+                        continue
+                    if entries is None:
+                        quarantined.append(name)
+                        continue
+
+                    for entry in entries:
+                        day_entries[entry["project"]].append(entry["entry"])
+                    day_files.append(file_path)
+
+                # Merge into log files
+                for project, bullets_list in day_entries.items():
+                    combined_bullets = "\n\n".join(bullets_list)
+                    merge_into_log(project, file_date, combined_bullets)
+                    log.info("  -> %s  (%s)", project, file_date)
+
+                # Archive only after the entries are safely in the logs
+                for file_path in day_files:
+                    move_to_processed(file_path, file_date)
+                    record_success(file_path)
+                    started.pop(file_path, None)
+                    processed += 1
+            finally:
+                for file_path, claim in claims.items():
+                    release_claim(file_path, claim)
+    except BaseException as e:
+        refund_attempts(started, interrupted=isinstance(e, KeyboardInterrupt))
+        raise
+
+    log_summary(processed, failed, quarantined)
+    log_parse_stats()
+    log.info("Klaar.")
+
 
-        for file_path in by_date[file_date]:
-            time_label = extract_time_label(file_path)
-            entries = process_file(file_path, file_date, time_label)
+def run_stream():
+    """Streaming batch mode for very large inboxes.
 
-            for entry in entries:
-                project = normalize_project_name(entry.get("project", ONBEKEND_PROJECT))
-                content = entry.get("entry", "")
-                if content.strip():
-                    day_entries[project].append(content.strip())
+    The inbox is listed and sorted by (date, name) once, like --batch, but
+    at most STREAM_WINDOW files are in flight at a time. Finished files are
+    grouped while they share a date; a group is merged into the logs (and
+    its files archived) as soon as the date changes or the group is full,
+    so memory use and time to first output do not grow with the size of
+    the inbox, only the list of names does.
+    """
+    ensure_dirs()
 
-            move_to_processed(file_path, file_date)
+    files = sorted((extract_date(path), path) for path in collect_inbox_files())
+    if not files:
+        log.info("Geen bestanden in inbox.")
+        return
 
-        # Merge into log files
+    total = len(files)
+    processed = 0
+    failed: list[str] = []
+    quarantined: list[str] = []
+    started_at = time.monotonic()
+    done = 0
+
+    group_date: str | None = None
+    group_files: list[str] = []
+    day_entries: dict[str, list[str]] = defaultdict(list)
+    claims: dict[str, object] = {}
+    started: dict[str, bool] = {}
+    stop = threading.Event()
+
+    def flush():
+        nonlocal processed
         for project, bullets_list in day_entries.items():
-            combined_bullets = "\n\n".join(bullets_list)
-            existing = read_existing_log(project)
-            merged = append_to_date_section(existing, file_date, combined_bullets)
-            write_log(project, merged)
-            log.info("  -> %s  (%s)", project, file_date)
+            merge_into_log(project, group_date, "\n\n".join(bullets_list))
+            log.info("  -> %s  (%s)", project, group_date)
+        # Archive only after the entries are safely in the logs
+        for file_path in group_files:
+            move_to_processed(file_path, group_date)
+            record_success(file_path)
+            started.pop(file_path, None)
+            release_claim(file_path, claims.pop(file_path))
+        processed += len(group_files)
+        group_files.clear()
+        day_entries.clear()
+
+    pending = iter(files)
+    window: deque[tuple[str, str, Future]] = deque()
+    pool = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+
+    def fill():
+        while len(window) < STREAM_WINDOW:
+            file_date, path = next(pending, (None, None))
+            if path is None:
+                return
+            claim = claim_file(path)
+            if claim is None:
+                log.info("  Overgeslagen (andere run is bezig): %s", os.path.basename(path))
+                continue
+            claims[path] = claim
+            window.append((path, file_date, pool.submit(process_attempt, path, file_date, started, stop)))
 
+    try:
+        fill()
+        while window:
+            file_path, file_date, future = window.popleft()
+            fill()
+            name = os.path.basename(file_path)
+            try:
+                entries = future.result()
+            except Exception as e:
+                started.pop(file_path, None)
+                if record_failure(file_path, e):
+                    quarantined.append(name)
+                else:
+                    failed.append(name)
+                release_claim(file_path, claims.pop(file_path))
+            else:
+                if entries is None:
+                    quarantined.append(name)
+                    release_claim(file_path, claims.pop(file_path))
+                else:
+                    if file_date != group_date or len(group_files) >= STREAM_WINDOW:
+                        flush()
+                        group_date = file_date
+                    group_files.append(file_path)
+                    for entry in entries:
+                        day_entries[entry["project"]].append(entry["entry"])
+
+            done += 1
+            elapsed = time.monotonic() - started_at
+            eta = elapsed / done * max(total - done, 0)
+            log.info("  [%d/%d] %s  (nog ~%ds)", done, total, name, eta)
+
+        flush()
+    except BaseException as e:
+        refund_attempts(started, interrupted=isinstance(e, KeyboardInterrupt), stop=stop)
+        raise
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+    log_summary(processed, failed, quarantined)
+    log_parse_stats()
     log.info("Klaar.")
 
 
@@ -646,40 +1680,671 @@ def run_interactive():
         file_date = extract_date(file_path)
         by_date[file_date].append(file_path)
 
-    for file_date in sorted(by_date):
-        day_entries: dict[str, list[str]] = defaultdict(list)
-
-        for file_path in by_date[file_date]:
-            time_label = extract_time_label(file_path)
-            entries = process_file(file_path, file_date, time_label)
-
-            for entry in entries:
-                project = normalize_project_name(entry.get("project", ONBEKEND_PROJECT))
-                content = entry.get("entry", "")
-                if not content.strip():
+    files = [(file_date, path) for file_date in sorted(by_date) for path in by_date[file_date]]
+
+    # Classification of the next files and alias suggestions run in the
+    # background, so the user never waits on the network between prompts
+    file_pool = ThreadPoolExecutor(max_workers=max(1, PREFETCH_FILES))
+    alias_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+    pending: dict[int, Future | None] = {}
+    claims: dict[str, object] = {}
+    started: dict[str, bool] = {}
+    stop = threading.Event()
+    processed = 0
+    failed: list[str] = []
+    quarantined: list[str] = []
+
+    def prefetch(upto: int):
+        for i in range(upto, min(upto + PREFETCH_FILES + 1, len(files))):
+            if i not in pending:
+                file_date, path = files[i]
+                claim = claim_file(path)
+                if claim is None:
+                    pending[i] = None
                     continue
+                claims[path] = claim
+                pending[i] = file_pool.submit(process_attempt, path, file_date, started, stop)
+
+    try:
+        day_entries: dict[str, list[str]] = defaultdict(list)
+        day_files: list[str] = []
+        deferred: list[tuple[str, str, Future]] = []
+
+        for index, (file_date, file_path) in enumerate(files):
+            prefetch(index)
+            name = os.path.basename(file_path)
+            future = pending.pop(index)
+            if future is None:
+                print(f"  Overgeslagen (andere run is bezig): {name}")
+                entries = None
+            else:
+                try:
+                    entries = future.result()
+                except Exception as e:
+                    started.pop(file_path, None)
+                    if record_failure(file_path, e):
+                        quarantined.append(name)
+                    else:
+                        failed.append(name)
+                    entries = None
+                else:
+                    if entries is None:
+                        quarantined.append(name)
 
+            for entry in entries or []:
+                project, content = entry["project"], entry["entry"]
                 if project == ONBEKEND_PROJECT:
+                    speculative = {
+                        candidate: alias_pool.submit(fetch_alias_suggestions, candidate, content)
+                        for candidate in rank_projects(content)
+                    }
                     project = ask_project_assignment(content)
                     if project != ONBEKEND_PROJECT:
-                        suggest_aliases(project, content)
+                        future = speculative.get(project) or alias_pool.submit(
+                            fetch_alias_suggestions, project, content
+                        )
+                        deferred.append((project, content, future))
+                    for candidate, future in speculative.items():
+                        if candidate != project:
+                            future.cancel()
+
+                # Offer suggestions that are ready; the rest waits until later
+                deferred = _offer_alias_suggestions(deferred, wait=False)
+
+                day_entries[project].append(content)
+
+            if entries is not None:
+                day_files.append(file_path)
+
+            is_last_of_day = index + 1 == len(files) or files[index + 1][0] != file_date
+            if is_last_of_day:
+                deferred = _offer_alias_suggestions(deferred, wait=True)
+                for project, bullets_list in day_entries.items():
+                    combined_bullets = "\n\n".join(bullets_list)
+                    merge_into_log(project, file_date, combined_bullets)
+                    print(f"  -> {project}  ({file_date})")
+                # Archive only after the entries are safely in the logs
+                for path in day_files:
+                    move_to_processed(path, file_date)
+                    record_success(path)
+                    started.pop(path, None)
+                    processed += 1
+                day_entries = defaultdict(list)
+                day_files = []
+                for path in [p for d, p in files[: index + 1] if d == file_date and p in claims]:
+                    release_claim(path, claims.pop(path))
+    except BaseException as e:
+        # Quitting with Ctrl-C is normal use; prefetched files must not be charged
+        refund_attempts(started, interrupted=isinstance(e, KeyboardInterrupt), stop=stop)
+        raise
+    finally:
+        file_pool.shutdown(wait=False, cancel_futures=True)
+        alias_pool.shutdown(wait=False, cancel_futures=True)
+        for path, claim in claims.items():
+            release_claim(path, claim)
+
+    log_summary(processed, failed, quarantined)
+    log_parse_stats()
+    print("Klaar.")
 
-                day_entries[project].append(content.strip())
 
-            move_to_processed(file_path, file_date)
+def _offer_alias_suggestions(
+    deferred: list[tuple[str, str, Future]], wait: bool
+) -> list[tuple[str, str, Future]]:
+    """Offer background-fetched alias suggestions; return those not yet ready."""
+    remaining: list[tuple[str, str, Future]] = []
+    for project, content, future in deferred:
+        if not wait and not future.done():
+            remaining.append((project, content, future))
+            continue
+        try:
+            suggestions = future.result()
+        except Exception as e:
+            log.warning("  Zoektermen ophalen mislukt voor %s: %s", project, e)
+            continue
+        suggest_aliases(project, content, suggestions)
+    return remaining
 
-        for project, bullets_list in day_entries.items():
-            combined_bullets = "\n\n".join(bullets_list)
-            existing = read_existing_log(project)
-            merged = append_to_date_section(existing, file_date, combined_bullets)
-            write_log(project, merged)
-            print(f"  -> {project}  ({file_date})")
 
-    print("Klaar.")
+# ---------------------------------------------------------------------------
+# Rebuild from the processed archive
+# ---------------------------------------------------------------------------
+
+def collect_processed_files() -> list[tuple[str, str]]:
+    """All archived memos as (date, path), sorted by date folder and filename."""
+    files: list[tuple[str, str]] = []
+    if not os.path.isdir(PROCESSED):
+        return files
+    for file_date in sorted(os.listdir(PROCESSED)):
+        date_dir = os.path.join(PROCESSED, file_date)
+        if not _DATE_RE.fullmatch(file_date) or not os.path.isdir(date_dir):
+            continue
+        for filename in sorted(os.listdir(date_dir)):
+            ext = os.path.splitext(filename)[1].lower()
+            if ext in AUDIO_EXTENSIONS + TEXT_EXTENSIONS:
+                files.append((file_date, os.path.join(date_dir, filename)))
+    return files
+
+
+def _log_files(base_dir: str) -> dict[str, str]:
+    """{relative path: full path} of every .md log (incl. archief/) under base_dir."""
+    result: dict[str, str] = {}
+    for sub in ("", "archief"):
+        directory = os.path.join(base_dir, sub)
+        if not os.path.isdir(directory):
+            continue
+        for filename in sorted(os.listdir(directory)):
+            if filename.endswith(".md") and not filename.startswith(".") and filename != DIGEST_FILE:
+                result[os.path.join(sub, filename)] = os.path.join(directory, filename)
+    return result
+
+
+def _log_hashes(base_dir: str) -> dict[str, str]:
+    """{relative path: sha1} of every log under base_dir."""
+    hashes: dict[str, str] = {}
+    for rel, path in _log_files(base_dir).items():
+        with open(path, "rb") as f:
+            hashes[rel] = hashlib.sha1(f.read()).hexdigest()
+    return hashes
+
+
+# Rebuild calls ask for repeatable output, so two rebuilds of the same
+# archive give the same logs
+REBUILD_LLM_OPTIONS = {"temperature": 0, "seed": 11}
+
+
+def cached_classification(file_path: str, file_date: str, time_label: str) -> list[dict]:
+    """Classify an archived memo for --rebuild, reusing an earlier result.
+
+    The cache is keyed by the file content plus everything that shapes the
+    prompt (projects, reference context, model, chunking), so rerunning a
+    rebuild after a failure only pays for the files that have no result
+    yet, while a change to PROJECTEN or TEXT_MODEL starts from scratch.
+    """
+    sha = hashlib.sha1()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    settings = [build_prompt("", file_date), time_label, TEXT_MODEL, REBUILD_LLM_OPTIONS,
+                CHUNK_CHARS, CHUNK_OVERLAP]
+    sha.update(json.dumps(settings, ensure_ascii=False).encode("utf-8"))
+    cache_path = os.path.join(CLASSIFICATION_CACHE, f"{sha.hexdigest()}.json")
+
+    if os.path.exists(cache_path):
+        return validate_entries(json.loads(read_text(cache_path)))
+
+    entries = validate_entries(process_file(file_path, file_date, time_label, REBUILD_LLM_OPTIONS))
+    os.makedirs(CLASSIFICATION_CACHE, exist_ok=True)
+    atomic_write(cache_path, json.dumps(entries, ensure_ascii=False) + "\n")
+    return entries
+
+
+def run_rebuild():
+    """Re-classify the whole processed archive into a staging directory.
+
+    Files are classified in parallel (transcripts and earlier results come
+    from the caches when available) but merged in archive order, so the
+    result does not depend on which call finishes first. Live logs are left
+    untouched; a diff is written for review and `--rebuild --apply`
+    performs exactly that swap, including deletions.
+
+    The manifest records the live log hashes from before the archive is
+    read and any files that failed, so --apply can refuse a stale or
+    incomplete rebuild.
+    """
+    ensure_dirs()
+    staging = os.path.join(REBUILD_DIR, "projecten")
+    diff_path = os.path.join(REBUILD_DIR, "rebuild.diff")
+
+    live_hashes = _log_hashes(PROJECTEN_DIR)
+    files = collect_processed_files()
+    if not files:
+        log.info("Geen bestanden in archief.")
+        return
+
+    if os.path.isdir(staging):
+        shutil.rmtree(staging)
+    os.makedirs(staging)
+
+    def classify(item: tuple[str, str]) -> list[dict] | None:
+        file_date, path = item
+        try:
+            return cached_classification(path, file_date, extract_time_label(path))
+        except Exception as e:
+            log.error("  Fout bij %s: %s: %s", os.path.basename(path), type(e).__name__, e)
+            return None
+
+    log.info("Herbouwen uit %d gearchiveerde bestanden...", len(files))
+    failed: list[str] = []
+    day_entries: dict[str, list[str]] = defaultdict(list)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        # pool.map yields in input order, which keeps the merge deterministic
+        for index, ((file_date, path), entries) in enumerate(zip(files, pool.map(classify, files))):
+            if entries is None:
+                failed.append(os.path.relpath(path, PROCESSED))
+            else:
+                for entry in entries:
+                    day_entries[entry["project"]].append(entry["entry"])
+
+            is_last_of_day = index + 1 == len(files) or files[index + 1][0] != file_date
+            if is_last_of_day:
+                for project, bullets_list in day_entries.items():
+                    merge_into_log(project, file_date, "\n\n".join(bullets_list), base_dir=staging)
+                day_entries = defaultdict(list)
+            if (index + 1) % 50 == 0:
+                log.info("  %d/%d bestanden", index + 1, len(files))
+
+    live = _log_files(PROJECTEN_DIR)
+    staged = _log_files(staging)
+    diff: list[str] = []
+    changed = 0
+    for rel in sorted(set(live) | set(staged)):
+        old = read_text(live[rel]).splitlines(keepends=True) if rel in live else []
+        new = read_text(staged[rel]).splitlines(keepends=True) if rel in staged else []
+        lines = list(difflib.unified_diff(old, new, f"live/{rel}", f"rebuild/{rel}"))
+        if lines:
+            changed += 1
+            diff.extend(lines)
+    atomic_write(diff_path, "".join(diff))
+    manifest = {"live": live_hashes, "failed": failed}
+    atomic_write(REBUILD_MANIFEST, json.dumps(manifest, ensure_ascii=False, indent=2) + "\n")
+
+    log_parse_stats()
+    log.info("Herbouw klaar: %d logs in %s, %d gewijzigd t.o.v. live.", len(staged), staging, changed)
+    log.info("  Diff: %s", diff_path)
+    removed = sorted(set(live) - set(staged))
+    if removed:
+        log.warning("  Niet in de herbouw, worden bij --apply verwijderd: %s", ", ".join(removed))
+    if failed:
+        log.warning("  Overgeslagen door fouten: %s", ", ".join(failed))
+        log.warning("  Deze herbouw kan niet worden doorgevoerd; los de fouten op en draai --rebuild opnieuw.")
+    else:
+        log.info("  Na controle doorvoeren met: python verwerk.py --rebuild --apply")
+
+
+def apply_rebuild():
+    """Write the staged rebuild over the live logs.
+
+    Applies exactly the tree shown in rebuild.diff: live logs that the
+    rebuild did not produce are deleted, so entries it moved elsewhere are
+    not left behind twice. Refuses when files failed during the rebuild or
+    when any live log was added, changed or removed since it started, so
+    nothing written after the diff is lost.
+    """
+    staging = os.path.join(REBUILD_DIR, "projecten")
+    if not os.path.isdir(staging) or not os.path.exists(REBUILD_MANIFEST):
+        log.error("Geen herbouw gevonden in %s; draai eerst --rebuild.", REBUILD_DIR)
+        return
+
+    with open(REBUILD_MANIFEST, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest["failed"]:
+        log.error("Herbouw niet doorgevoerd: %d bestanden mislukten (%s). Draai --rebuild opnieuw.",
+                  len(manifest["failed"]), ", ".join(manifest["failed"]))
+        return
+
+    current = _log_hashes(PROJECTEN_DIR)
+    changed = sorted(
+        rel for rel in set(current) | set(manifest["live"])
+        if current.get(rel) != manifest["live"].get(rel)
+    )
+    if changed:
+        log.error("Herbouw niet doorgevoerd: live logs zijn gewijzigd sinds de herbouw (%s). "
+                  "Draai --rebuild opnieuw.", ", ".join(changed))
+        return
+
+    staged = _log_files(staging)
+    for rel, path in staged.items():
+        target = os.path.join(PROJECTEN_DIR, rel)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with file_lock(target):
+            atomic_write(target, read_text(path))
+    removed = sorted(set(current) - set(staged))
+    for rel in removed:
+        target = os.path.join(PROJECTEN_DIR, rel)
+        with file_lock(target):
+            os.remove(target)
+
+    shutil.rmtree(REBUILD_DIR)
+    log.info("Herbouw doorgevoerd: %d logs vervangen, %d verwijderd.", len(staged), len(removed))
+    if removed:
+        log.info("  Verwijderd: %s", ", ".join(removed))
+
+
+# ---------------------------------------------------------------------------
+# Local classifier (bulk reassignment of _onbekend)
+# ---------------------------------------------------------------------------
+
+_STOPWORDS = frozenset(
+    """de het een en van in op te is dat die voor met aan er niet zijn wordt worden
+    om bij ook als nog naar over tot door of maar dan wel we ze hij zij je ik
+    besluiten afspraken signalen aandachtspunten memo""".split()
+)
+
+# How many times aliases and the project name count as an extra section
+ALIAS_WEIGHT = 3
+
+
+def _features(text: str) -> Counter:
+    """Word unigram + bigram counts, lowercased, without stopwords or numbers."""
+    words = [
+        w for w in re.findall(r"[^\W\d_]+", text.lower())
+        if len(w) > 1 and w not in _STOPWORDS
+    ]
+    features = Counter(words)
+    features.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    return features
+
+
+def _unit_vector(weights: dict[str, float]) -> dict[str, float]:
+    norm = math.sqrt(sum(w * w for w in weights.values()))
+    return {t: w / norm for t, w in weights.items()} if norm else {}
+
+
+def _tfidf(features: Counter, idf: dict[str, float]) -> dict[str, float]:
+    return _unit_vector({
+        t: (1 + math.log(c)) * idf[t] for t, c in features.items() if t in idf
+    })
+
+
+def train_local_classifier() -> tuple[dict[str, float], dict[str, dict[str, float]]]:
+    """Build a TF-IDF centroid per project from its log sections and aliases.
+
+    Returns (idf, {project: unit centroid vector}).
+    """
+    docs: list[tuple[str, Counter]] = []
+    for project, aliases in PROJECTEN.items():
+        for year in [None] + shard_years(project):
+            _, sections = split_date_sections(read_existing_log(project, year))
+            docs.extend((project, _features(_section_body(text))) for _, text in sections)
+        alias_doc = _features(" ".join(aliases + [project.split(" – ")[-1]]))
+        docs.extend((project, alias_doc) for _ in range(ALIAS_WEIGHT))
+
+    df = Counter(term for _, features in docs for term in features)
+    idf = {t: math.log((1 + len(docs)) / (1 + n)) + 1 for t, n in df.items()}
+
+    sums: dict[str, Counter] = defaultdict(Counter)
+    for project, features in docs:
+        sums[project].update(_tfidf(features, idf))
+    centroids = {project: _unit_vector(dict(total)) for project, total in sums.items()}
+    return idf, centroids
+
+
+def score_local(
+    texts: list[str], idf: dict[str, float], centroids: dict[str, dict[str, float]]
+) -> list[list[tuple[str, float]]]:
+    """Cosine scores of every text against every centroid, best first.
+
+    Uses an inverted index (term -> project weights), so each text only
+    touches the centroids that share at least one term with it.
+    """
+    postings: dict[str, list[tuple[str, float]]] = defaultdict(list)
+    for project, vector in centroids.items():
+        for term, weight in vector.items():
+            postings[term].append((project, weight))
+
+    results: list[list[tuple[str, float]]] = []
+    for text in texts:
+        scores: dict[str, float] = defaultdict(float)
+        for term, weight in _tfidf(_features(text), idf).items():
+            for project, centroid_weight in postings.get(term, ()):
+                scores[project] += weight * centroid_weight
+        results.append(sorted(scores.items(), key=lambda item: -item[1]))
+    return results
+
+
+def confident_match(scores: list[tuple[str, float]]) -> str | None:
+    """Project for a scored entry if it clears the score and margin thresholds."""
+    if not scores or scores[0][1] < RECLASSIFY_MIN_SCORE:
+        return None
+    runner_up = scores[1][1] if len(scores) > 1 else 0.0
+    if scores[0][1] - runner_up < RECLASSIFY_MARGIN:
+        return None
+    return scores[0][0]
+
+
+def _section_units(section: str) -> list[tuple[str | None, list[int]]] | None:
+    """Bullets of a date section as (sub-section heading, line indexes).
+
+    Indented lines belong to the bullet above them. Returns None when the
+    section holds other text, such as a raw LLM dump, so it is left alone.
+    """
+    units: list[tuple[str | None, list[int]]] = []
+    heading = None
+    for i, line in enumerate(section.split("\n")[1:], start=1):
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if stripped in SUBSECTION_NAMES:
+            heading = stripped
+        elif line.startswith("- "):
+            units.append((heading, [i]))
+        elif line[0].isspace() and units:
+            units[-1][1].append(i)
+        else:
+            return None
+    return units
+
+
+def _drop_lines(section: str, drop: set[int]) -> str | None:
+    """Section without the given lines and the headings they leave empty.
+
+    Returns None if no bullets are left.
+    """
+    lines = [line for i, line in enumerate(section.split("\n")) if i not in drop]
+    kept: list[str] = []
+    for i, line in enumerate(lines):
+        if line.strip() in SUBSECTION_NAMES:
+            following = next((next_line for next_line in lines[i + 1 :] if next_line.strip()), "")
+            if not following.startswith("- "):
+                continue
+        kept.append(line)
+    if not any(line.startswith("- ") for line in kept):
+        return None
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(kept)).strip() + "\n"
+
+
+def reclassify_onbekend(dry_run: bool = False):
+    """Move _onbekend bullets to a project when the local classifier is confident.
+
+    Each bullet is scored on its own and moved under the same sub-section
+    heading; the rest of the date section stays in _onbekend. Sections with
+    text other than headings and bullets are skipped.
+    """
+    ensure_dirs()
+    idf, centroids = train_local_classifier()
+
+    moved = 0
+    kept = 0
+    skipped = 0
+    with project_lock(ONBEKEND_PROJECT):
+        for year in [None] + shard_years(ONBEKEND_PROJECT):
+            preamble, sections = split_date_sections(read_existing_log(ONBEKEND_PROJECT, year))
+            if not sections:
+                continue
+
+            remaining: list[str] = []
+            for section_date, text in sections:
+                units = _section_units(text)
+                if not units:
+                    # Raw LLM output (or an empty section) stays as it is
+                    if units is None:
+                        skipped += 1
+                    remaining.append(text)
+                    continue
+
+                lines = text.split("\n")
+                unit_texts = ["\n".join(lines[i] for i in indexes) for _, indexes in units]
+                targets: dict[str, dict[str | None, list[str]]] = defaultdict(lambda: defaultdict(list))
+                drop: set[int] = set()
+                for (heading, indexes), unit_text, scores in zip(
+                    units, unit_texts, score_local(unit_texts, idf, centroids)
+                ):
+                    project = confident_match(scores)
+                    if project is None:
+                        kept += 1
+                        continue
+                    log.info("  %s -> %s  (score %.2f): %.60s", section_date, project, scores[0][1], lines[indexes[0]][2:])
+                    moved += 1
+                    targets[project][heading].append(unit_text)
+                    drop.update(indexes)
+
+                for project, by_heading in targets.items():
+                    # Bullets without a heading first, as _merge_subsections expects
+                    blocks = [
+                        "\n".join(([heading] if heading else []) + by_heading[heading])
+                        for heading in sorted(by_heading, key=lambda h: h is not None)
+                    ]
+                    if not dry_run:
+                        merge_into_log(project, section_date, "\n\n".join(blocks))
+
+                rest = _drop_lines(text, drop) if drop else text
+                if rest is not None:
+                    remaining.append(rest)
+
+            if not dry_run:
+                write_log(ONBEKEND_PROJECT, _join_sections(preamble, remaining), year)
+
+    verb = "zou verplaatsen" if dry_run else "verplaatst"
+    log.info("Klaar: %d bullets %s, %d blijven in %s.", moved, verb, kept, ONBEKEND_PROJECT)
+    if skipped:
+        log.info("  %d secties zonder bullets (ruwe uitvoer) overgeslagen.", skipped)
+
+
+# ---------------------------------------------------------------------------
+# Digest
+# ---------------------------------------------------------------------------
+
+def summarize_section(project: str, section: str) -> str:
+    """One- or two-sentence LLM summary of a single date section."""
+    prompt = f"""Vat deze logboeksectie van project "{project}" samen in maximaal twee zakelijke zinnen.
+Noem besluiten en belangrijke signalen. Geen inleiding, geen aannames.
+
+{section}"""
+    response = chat_completion([{"role": "user", "content": prompt}])
+    return (response.choices[0].message.content or "").strip()
+
+
+def run_digest(days: int):
+    """Write a cross-project digest of what changed in the last `days` days.
+
+    Every date section is hashed, and input/cache/digest-seen.json records
+    the day each hash was first seen. The digest covers the sections first
+    seen within the period, whatever their ## date, so late memos (retries,
+    a holiday backlog, a --stream import) are included on the day they land
+    in the logs. Only sections whose hash is not in the summary cache are
+    sent to the LLM, so the nightly cost follows what changed that day.
+    """
+    ensure_dirs()
+    today = date.today().isoformat()
+    first_day = (date.today() - timedelta(days=days - 1)).isoformat()
+
+    # {hash: (project, date, section_text)} for every section in the logs
+    sections: dict[str, tuple[str, str, str]] = {}
+    for filename in sorted(os.listdir(PROJECTEN_DIR)):
+        if not filename.endswith(".md") or filename.startswith((".", "_")):
+            continue
+        project = filename.removesuffix(".md")
+        for year in [None] + shard_years(project):
+            for section_date, text in split_date_sections(read_existing_log(project, year))[1]:
+                digest = hashlib.sha1(f"{project}\n{text}".encode("utf-8")).hexdigest()
+                sections[digest] = (project, section_date, text)
+
+    with file_lock(DIGEST_SEEN):
+        if os.path.exists(DIGEST_SEEN):
+            old_seen = json.loads(read_text(DIGEST_SEEN))
+        else:
+            # First run: only sections dated in the period count as new,
+            # instead of summarizing the whole history at once
+            old_seen = {d: "" for d, (_, section_date, _) in sections.items() if section_date < first_day}
+        # Hashes of sections that have since changed or disappeared are dropped
+        seen = {d: old_seen.get(d, today) for d in sections}
+        os.makedirs(os.path.dirname(DIGEST_SEEN), exist_ok=True)
+        atomic_write(DIGEST_SEEN, json.dumps(seen, indent=1) + "\n")
+
+    # {project: [(date, hash, section_text)]}
+    recent: dict[str, list[tuple[str, str, str]]] = defaultdict(list)
+    for digest, (project, section_date, text) in sections.items():
+        if seen[digest] >= first_day:
+            recent[project].append((section_date, digest, text))
+
+    cache = _load_summary_cache()
+
+    todo = [
+        (project, digest, text)
+        for project, items in recent.items()
+        for _, digest, text in items
+        if digest not in cache
+    ]
+    failed = 0
+    if todo:
+        log.info("Samenvatten: %d nieuwe of gewijzigde secties...", len(todo))
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            futures = {
+                pool.submit(summarize_section, project, text): digest
+                for project, digest, text in todo
+            }
+            for future in as_completed(futures):
+                digest = futures[future]
+                # A failed section is retried next run; finished ones are
+                # saved right away so they are not paid for twice
+                try:
+                    cache[digest] = future.result()
+                except Exception as e:
+                    log.warning("  Samenvatten mislukt: %s: %s", type(e).__name__, e)
+                    failed += 1
+                    continue
+                _save_summary(digest, cache[digest])
+
+    period = today if days == 1 else f"{first_day} t/m {today}"
+    lines = [f"# Overzicht {period}", "", "Nieuwe of gewijzigde datumsecties, ongeacht hun datum.", ""]
+    if not recent:
+        lines.append("Geen nieuwe entries.")
+    for project in sorted(recent):
+        lines.append(f"## {project}")
+        lines.append("")
+        for section_date, digest, _ in sorted(recent[project], reverse=True):
+            lines.append(f"- {section_date}: {cache.get(digest, '(nog geen samenvatting)')}")
+        lines.append("")
+
+    path = os.path.join(PROJECTEN_DIR, DIGEST_FILE)
+    with file_lock(path):
+        atomic_write(path, "\n".join(lines).rstrip("\n") + "\n")
+    log.info("Overzicht geschreven: %s (%d projecten, %d samengevat, %d mislukt).",
+             path, len(recent), len(todo) - failed, failed)
+
+
+def _load_summary_cache() -> dict[str, str]:
+    if not os.path.exists(SUMMARY_CACHE):
+        return {}
+    with open(SUMMARY_CACHE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_summary(digest: str, summary: str):
+    """Add one summary to the cache file, re-reading it under the lock."""
+    os.makedirs(os.path.dirname(SUMMARY_CACHE), exist_ok=True)
+    with file_lock(SUMMARY_CACHE):
+        cache = _load_summary_cache()
+        cache[digest] = summary
+        atomic_write(SUMMARY_CACHE, json.dumps(cache, ensure_ascii=False, indent=1) + "\n")
 
 
 def main():
-    if "--batch" in sys.argv:
+    if "--digest" in sys.argv:
+        run_digest(days=7 if "--weekly" in sys.argv else 1)
+    elif "--reclassify-onbekend" in sys.argv:
+        reclassify_onbekend(dry_run="--dry-run" in sys.argv)
+    elif "--rebuild" in sys.argv:
+        if "--apply" in sys.argv:
+            apply_rebuild()
+        else:
+            run_rebuild()
+    elif "--shard" in sys.argv:
+        shard_all()
+    elif "--stream" in sys.argv:
+        run_stream()
+    elif "--batch" in sys.argv:
         run_batch()
     else:
         run_interactive()